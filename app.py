@@ -1,82 +1,311 @@
-from flask import Flask, render_template, request
-import bakers_calculators as bc
+import gzip
+import json
+import os
+import queue
 
-app = Flask(__name__)
+import click
+from flask import Blueprint, Flask, Response, abort, current_app, render_template, request, url_for
+from flask.cli import with_appcontext
+from jinja2 import ChoiceLoader, FileSystemLoader, ModuleLoader
+
+import models
+from assets import ENCODINGS, AssetPipeline
+
+# Seconds between keep-alive comments on an idle weighing stream.
+STREAM_KEEP_ALIVE = 15
+DEFAULT_COMPILED_TEMPLATES = "compiled_templates"
+# Fingerprinted assets never change, browsers can keep them for a year.
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+# Smaller pages don't win anything with gzip.
+MIN_COMPRESS_SIZE = 500
+
+bp = Blueprint('bread_buddy', __name__)
+
+
+def create_app(config=None):
+    """Application factory.
+
+    Models and templates are loaded on first use, unless PRELOAD is set.
+
+    Config:
+        PRELOAD: Load all models and templates while creating the app. Default False.
+        PRECOMPILED_TEMPLATES: Folder with templates from `flask compile-templates`,
+            compile again after changing templates. Default None.
+        LIVE_WEIGHING: Serve the /scales routes. Sessions live in one process,
+            so turn it off when running several worker processes. Default True.
+
+    All can also be set as environment variables, eg. FLASK_PRELOAD=true.
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(PRELOAD=False, PRECOMPILED_TEMPLATES=None, LIVE_WEIGHING=True)
+    app.config.from_prefixed_env()
+    if config:
+        app.config.update(config)
+
+    compiled = app.config["PRECOMPILED_TEMPLATES"]
+    if compiled and not os.path.isdir(compiled):
+        # Not an error: `flask compile-templates` itself runs with this config.
+        app.logger.warning("No precompiled templates in '%s', templates load from source. "
+                           "Run `flask compile-templates %s`.", compiled, compiled)
+    elif compiled:
+        # Templates that aren't compiled (yet) still load from the template folder.
+        app.jinja_env.loader = ChoiceLoader([ModuleLoader(compiled), app.jinja_env.loader])
+
+    app.extensions["assets"] = AssetPipeline(app.static_folder)
+    # One live WeighingSession per bench scale, keyed on scale id.
+    app.extensions["weighing_sessions"] = {}
+    app.register_blueprint(bp)
+    app.cli.add_command(compile_templates_command)
+
+    if app.config["PRELOAD"]:
+        warm_up(app)
+
+    return app
+
+
+def template_names(app):
+    """Names of all templates in the app's template folder."""
+    return FileSystemLoader(os.path.join(app.root_path, app.template_folder)).list_templates()
 
-@app.route('/', methods=['GET', 'POST'])
-def home():
-    """Homepage"""
-    # return render_template('index.html')
 
-    """Baker's percentage calculator"""
+def warm_up(app):
+    """Load all models and compile all templates, eg. before forking workers."""
+    models.load_all()
+    for name in template_names(app):
+        app.jinja_env.get_template(name)
+    # One request sets up the rest, like the url map and the request machinery.
+    app.test_client().get('/')
+
+
+@click.command('compile-templates')
+@click.argument('target', default=DEFAULT_COMPILED_TEMPLATES)
+@with_appcontext
+def compile_templates_command(target):
+    """Compile the Jinja templates to Python modules in TARGET."""
+    source = os.path.join(current_app.root_path, current_app.template_folder)
+    env = current_app.jinja_env.overlay(loader=FileSystemLoader(source))
+    env.compile_templates(target, zip=None)
+    click.echo(f"Compiled {len(template_names(current_app))} template(s) to {target}/")
+
+
+def calculate(form):
+    """Baker's percentage calculator
+
+    Args:
+        form: The submitted calculator form.
+
+    Returns:
+        dict: Template context for the results block.
+    """
     result = None
     hydration_result = None
     water_temp_result = None
-    fermentation_result = None  
+    fermentation_result = None
     error = None
 
-    if request.method == 'POST':
-        try:
-            # Get form data
-            flour_weight = float(request.form.get('flour_weight'))
-            water_ratio = float(request.form.get('water_ratio')) / 100
-            salt_ratio = float(request.form.get('salt_ratio')) / 100
-            levain_ratio = float(request.form.get('levain_ratio')) / 100
-            scale_factor = float(request.form.get('scale_factor', 1))
-            
-            # Additional settings
-            ambient_temp = float(request.form.get('ambient_temp', 22))
-            target_dough_temp = float(request.form.get('target_dough_temp', 25))
-            base_fermentation = float(request.form.get('base_fermentation', 4))
-            
-            # Build formula
-            formula = {
-                "water_weight": water_ratio,
-                "salt_weight": salt_ratio,
-                "levain_weight": levain_ratio
-            }
-            
-            # Calculate
-            result = bc.bakers_percentage(flour_weight, formula)
-            hydration_result = bc.calculate_hydration(
-                result['flour_weight'], 
-                result['water_weight']
-            )
-
-            # Scaling happens here
-            if scale_factor != 1:
-                result = bc.recipe_scaler(scale_factor, result)
-
-
-
-            # Water temp using target_dough_temp
-            water_temp_result = bc.mixing_water_temperature(
-            ddt=target_dough_temp,
-            ambient_temp=ambient_temp
-        )
-
-            # Bulk fermentation using base_fermentation
-            fermentation_result = bc.bulk_fermentation_adjuster(
-            base_fermentation, 
-            ambient_temp=ambient_temp
-        )
-
-        except (ValueError, TypeError) as e:
-            error = str(e)
-        
-    return render_template('index.html',
-                        result=result,
-                        hydration_result=hydration_result,
-                        water_temp_result=water_temp_result,
-                        fermentation_result=fermentation_result,
-                        error=error)
+    try:
+        # Get form data
+        flour_weight = float(form.get('flour_weight'))
+        water_ratio = float(form.get('water_ratio')) / 100
+        salt_ratio = float(form.get('salt_ratio')) / 100
+        levain_ratio = float(form.get('levain_ratio')) / 100
+        scale_factor = float(form.get('scale_factor', 1))
+
+        # Additional settings
+        ambient_temp = float(form.get('ambient_temp', 22))
+        target_dough_temp = float(form.get('target_dough_temp', 25))
+        base_fermentation = float(form.get('base_fermentation', 4))
+
+        # Build formula
+        formula = {
+            "water_weight": water_ratio,
+            "salt_weight": salt_ratio,
+            "levain_weight": levain_ratio
+        }
+
+        # Calculate
+        recipe = models.Recipe.from_bakers_percentage("Bread Buddy", flour_weight, formula)
+        dough = models.Dough(recipe)
+        hydration_result = {
+            "hydration": dough.hydration,
+            "description": dough.hydration_description
+        }
+
+        # Scaling happens here
+        if scale_factor != 1:
+            recipe = recipe.scale(scale_factor)
+
+        result = {f"{ingredient.name}_weight": round(ingredient.weight, 1) for ingredient in recipe.ingredients}
+        result["total_weight"] = round(recipe.total_weight, 1)
+
+        # Water temp using target_dough_temp
+        water_temp_result = dough.calculate_water_temperature(
+        target_temp=target_dough_temp,
+        ambient_temp=ambient_temp
+    )
+
+        # Bulk fermentation using base_fermentation
+        fermentation_result = dough.calculate_fermentation_time(
+        base_fermentation,
+        ambient_temp=ambient_temp
+    )
+
+    except (ValueError, TypeError) as e:
+        error = str(e)
+
+    return {
+        "result": result,
+        "hydration_result": hydration_result,
+        "water_temp_result": water_temp_result,
+        "fermentation_result": fermentation_result,
+        "error": error
+    }
+
+
+@bp.route('/', methods=['GET', 'POST'])
+def home():
+    """Homepage"""
+    context = calculate(request.form) if request.method == 'POST' else {}
+    return render_template('index.html', **context)
+
+
+@bp.route('/results', methods=['POST'])
+def results():
+    """Only the results block, so a recalculation doesn't reload the whole page."""
+    return render_template('_results.html', **calculate(request.form))
 
 # @app.route('/bakers-percentage', methods=['GET', 'POST'])
 # def bakers_percentage():
 
-    
+
 #     return render_template('bakers_percentage.html', result=result, error=error)
 
 
+@bp.app_template_global()
+def asset_url(name):
+    """URL of the fingerprinted version of a static file, None if there is no such file."""
+    fingerprinted = current_app.extensions["assets"].fingerprinted(name)
+    if fingerprinted is None:
+        return None
+    return url_for('bread_buddy.asset', filename=fingerprinted)
+
+
+@bp.route('/assets/<path:filename>')
+def asset(filename):
+    """Fingerprinted static file, precompressed and cacheable forever."""
+    found = current_app.extensions["assets"].get(filename)
+    if found is None:
+        abort(404)
+
+    encoding = request.accept_encodings.best_match(
+        [encoding for encoding in ENCODINGS if encoding in found.encoded]
+    )
+    response = Response(found.encoded.get(encoding, found.body), mimetype=found.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{found.fingerprint}-{encoding or 'identity'}")
+    response.cache_control.public = True
+    response.cache_control.max_age = ASSET_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+
+@bp.after_app_request
+def compress_page(response):
+    """Gzip HTML pages and fragments, and answer unchanged pages with 304 Not Modified."""
+    if (response.mimetype != 'text/html' or response.is_streamed
+            or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+
+    if request.method == 'GET':
+        response.add_etag(weak=True)
+        response.make_conditional(request)
+
+    if (response.status_code != 200 or 'gzip' not in request.accept_encodings
+            or response.content_length < MIN_COMPRESS_SIZE):
+        return response
+
+    response.set_data(gzip.compress(response.get_data()))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+@bp.before_request
+def check_live_weighing():
+    """Scale routes only work when all requests reach the process with the sessions."""
+    if request.path.startswith('/scales/') and not current_app.config["LIVE_WEIGHING"]:
+        return {"error": "Live weighing needs a single worker process (serve.py --workers 1)."}, 503
+    return None
+
+
+@bp.route('/scales/<scale_id>', methods=['POST'])
+def start_weighing(scale_id):
+    """Start weighing a recipe on a scale.
+
+    Expects the recipe as JSON, in the Recipe.to_dict() format.
+    """
+    try:
+        recipe = models.Recipe.from_dict(request.get_json())
+        session = models.WeighingSession(recipe)
+    except (KeyError, ValueError, TypeError) as e:
+        return {"error": str(e)}, 400
+
+    # Streams on the old recipe end, so clients reconnect to this one.
+    weighing_sessions = current_app.extensions["weighing_sessions"]
+    previous = weighing_sessions.get(scale_id)
+    weighing_sessions[scale_id] = session
+    if previous is not None:
+        previous.close()
+    return session.snapshot(), 201
+
+
+@bp.route('/scales/<scale_id>/readings', methods=['POST'])
+def add_reading(scale_id):
+    """Receive one reading from a scale: {"ingredient": str, "weight": float}"""
+    session = current_app.extensions["weighing_sessions"].get(scale_id)
+    if session is None:
+        return {"error": f"No recipe on scale '{scale_id}'."}, 404
+
+    try:
+        reading = request.get_json()
+        update = session.add_reading(reading["ingredient"], float(reading["weight"]))
+    except (KeyError, ValueError, TypeError) as e:
+        return {"error": str(e)}, 400
+
+    return update
+
+
+@bp.route('/scales/<scale_id>/stream')
+def weighing_stream(scale_id):
+    """Server-Sent Events stream with every update of a scale."""
+    session = current_app.extensions["weighing_sessions"].get(scale_id)
+    if session is None:
+        return {"error": f"No recipe on scale '{scale_id}'."}, 404
+
+    # Subscribe right away: the session could be replaced (and closed)
+    # before the response starts streaming.
+    subscriber = session.subscribe()
+
+    def events():
+        yield f"event: snapshot\ndata: {json.dumps(session.snapshot())}\n\n"
+        while True:
+            try:
+                update = subscriber.get(timeout=STREAM_KEEP_ALIVE)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if update is None:
+                break
+            yield f"data: {json.dumps(update)}\n\n"
+
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    # Also runs when the client is gone before the stream started.
+    response.call_on_close(lambda: session.unsubscribe(subscriber))
+    return response
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
@@ -0,0 +1,151 @@
+"""
+filename: assets.py
+-------------------
+
+This file contains the AssetPipeline class. It prepares the static files
+once, when the app starts, so every request only sends bytes that are ready:
+
+    - CSS is minified, and font urls in it point to the fingerprinted fonts
+    - every file gets a fingerprint in its name, eg. style.3f2a9c1e.css,
+      so browsers can cache it forever
+    - text files are gzip and brotli compressed up front
+
+Brotli is optional, install `brotli` (or `brotlicffi`) to get .br responses.
+
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+FINGERPRINT_LENGTH = 10
+# Fonts are already compressed, compressing them again only costs time.
+COMPRESSIBLE_TYPES = {"text/css", "text/javascript", "image/svg+xml"}
+ENCODINGS = ("br", "gzip")
+CSS_URL = re.compile(r"""url\(\s*["']?([^"')]+?)["']?\s*\)""")
+
+
+def minify_css(css: str) -> str:
+    """ Remove comments and whitespace from CSS.
+
+    Simple on purpose: it doesn't know about strings, so keep comment-like
+    text and significant spaces out of CSS string values.
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+class Asset:
+    """ One static file, ready to send.
+
+    Args:
+        name: Path relative to the static folder, eg. "style.css".
+        body: File content.
+        mimetype: Content type, eg. "text/css".
+    """
+    def __init__(self, name: str, body: bytes, mimetype: str):
+        self.name = name
+        self.body = body
+        self.mimetype = mimetype
+        self.fingerprint = hashlib.sha256(body).hexdigest()[:FINGERPRINT_LENGTH]
+        stem, ext = os.path.splitext(name)
+        self.fingerprinted_name = f"{stem}.{self.fingerprint}{ext}"
+
+        # Encoding -> compressed body, only kept when it's actually smaller.
+        self.encoded = {}
+        if mimetype in COMPRESSIBLE_TYPES:
+            compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(body)
+            self.encoded = {
+                encoding: data for encoding, data in compressed.items()
+                if len(data) < len(body)
+            }
+
+    def __str__(self):
+        return f"Asset({self.fingerprinted_name})"
+
+    def __repr__(self):
+        return f"Asset(name={self.name!r}, fingerprint={self.fingerprint!r}, size={len(self.body)})"
+
+
+class AssetPipeline:
+    """ All fingerprinted assets of a static folder.
+
+    Args:
+        static_folder: Folder with the source files.
+        names: Files to include, relative to static_folder. Default: all files.
+
+    Examples:
+        >>> assets = AssetPipeline("static")
+        >>> assets.fingerprinted("style.css")
+        'style.3f2a9c1e07.css'
+    """
+    def __init__(self, static_folder: str, names=None):
+        self.static_folder = static_folder
+        self.assets = {}    # name -> Asset
+        self._by_fingerprinted_name = {}
+
+        if names is None:
+            names = [
+                os.path.relpath(os.path.join(root, file), static_folder).replace(os.sep, "/")
+                for root, _, files in os.walk(static_folder) for file in files
+            ]
+        # CSS goes last, so the fonts and images it points to already have their fingerprint.
+        for name in sorted(names, key=lambda name: name.endswith(".css")):
+            self.add(name)
+
+    def __str__(self):
+        return f"AssetPipeline({self.static_folder})"
+
+    def __repr__(self):
+        return f"AssetPipeline(static_folder={self.static_folder!r}, assets={list(self.assets)})"
+
+    def add(self, name: str):
+        """ Read, process and fingerprint one file. Returns the Asset."""
+        with open(os.path.join(self.static_folder, name), "rb") as f:
+            body = f.read()
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+        if mimetype == "text/css":
+            css = self._rewrite_urls(body.decode(), os.path.dirname(name))
+            body = minify_css(css).encode()
+
+        asset = Asset(name, body, mimetype)
+        self.assets[name] = asset
+        self._by_fingerprinted_name[asset.fingerprinted_name] = asset
+        return asset
+
+    def _rewrite_urls(self, css, folder):
+        """ Point relative url()s in CSS to the fingerprinted files."""
+        def replace(match):
+            url = match.group(1)
+            name = os.path.normpath(os.path.join(folder, url)).replace(os.sep, "/")
+            if name not in self.assets:
+                return match.group(0)
+            fingerprinted = self.assets[name].fingerprinted_name
+            return f'url("{os.path.relpath(fingerprinted, folder or ".").replace(os.sep, "/")}")'
+
+        return CSS_URL.sub(replace, css)
+
+    def fingerprinted(self, name: str):
+        """ Fingerprinted name of a file, None if there is no such asset."""
+        asset = self.assets.get(name)
+        return asset.fingerprinted_name if asset else None
+
+    def get(self, fingerprinted_name: str):
+        """ Asset for a fingerprinted name, None if unknown (or outdated)."""
+        return self._by_fingerprinted_name.get(fingerprinted_name)
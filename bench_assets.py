@@ -0,0 +1,234 @@
+"""
+filename: bench_assets.py
+-------------------------
+
+Transferred bytes and time-to-result of the page, against local servers.
+
+    before  -- the app as it was before the asset pipeline: index.html and
+               static/style.css from git, uncompressed, a full page per POST
+    after   -- this app: gzip/brotli, fingerprinted assets, self-hosted fonts
+               and the /results fragment for a recalculation
+
+Both load the page like a browser: the stylesheets it links, and everything
+the CSS points to with url(), fonts included. Both are measured for a first
+visit (empty cache) and a repeat visit: the browser revalidates what it has
+an ETag for, and doesn't ask for immutable assets at all. Requests to other
+hosts (Google Fonts, before) can't be measured, they are listed instead.
+
+A local server has no slow network, so the time-to-result on a slow link is
+estimated from the size of the result response.
+
+Usage:
+    python bench_assets.py --runs 20
+"""
+
+import argparse
+import gzip
+import http.client
+import logging
+import os
+import re
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from flask import Flask, render_template, request
+from jinja2 import DictLoader
+from werkzeug.serving import make_server
+
+from app import calculate, create_app
+from assets import CSS_URL, brotli
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FORM = {
+    "flour_weight": "1000",
+    "water_ratio": "70",
+    "salt_ratio": "2",
+    "levain_ratio": "20",
+    "scale_factor": "1.5",
+    "ambient_temp": "22",
+    "target_dough_temp": "25",
+    "base_fermentation": "4",
+}
+# What a browser sends, for both apps.
+ACCEPT_ENCODING = "br, gzip" if brotli is not None else "gzip"
+LINK = re.compile(r"<link\b[^>]*>")
+ATTRIBUTE = re.compile(r'(\w+)="([^"]*)"')
+SLOW_LINK_KBPS = 256    # flaky bakery Wi-Fi
+
+
+def decode(data, encoding):
+    """Body as the browser sees it, after Content-Encoding."""
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return data
+
+
+class Client:
+    """Raw HTTP client that counts the bytes on the wire, like a browser with a cache."""
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port)
+        self.cache = {}     # path -> (etag, immutable, body)
+        self.external = set()
+        self.transferred = 0
+        self.requests = 0
+        self.last_size = 0
+
+    def request(self, method, path, body=None):
+        """Send one request (or answer it from the cache). Returns the decoded body."""
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        cached = self.cache.get(path) if method == "GET" else None
+        if cached:
+            etag, immutable, cached_body = cached
+            if immutable:
+                return cached_body
+            if etag:
+                headers["If-None-Match"] = etag
+        if body is not None:
+            body = urllib.parse.urlencode(body)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        self.requests += 1
+        self.last_size = len(data) + sum(len(k) + len(v) + 4 for k, v in response.getheaders())
+        self.transferred += self.last_size
+
+        if response.status == 304:
+            return cached[2]
+        data = decode(data, response.getheader("Content-Encoding"))
+        if method == "GET":
+            immutable = "immutable" in (response.getheader("Cache-Control") or "")
+            self.cache[path] = (response.getheader("ETag"), immutable, data)
+        return data
+
+    def get_linked(self, url, base):
+        """GET a url from a page or stylesheet, or note it down when it's on another host."""
+        url = urllib.parse.urljoin(base, url)
+        if urllib.parse.urlsplit(url).netloc:
+            self.external.add(url)
+            return b""
+        return self.request("GET", url)
+
+
+def visit(client, result_path):
+    """Load the page with its stylesheets and their fonts, then calculate a result."""
+    html = client.request("GET", "/").decode()
+    for link in LINK.findall(html):
+        attributes = dict(ATTRIBUTE.findall(link))
+        if attributes.get("rel") != "stylesheet":
+            continue
+        css_url = urllib.parse.urljoin("/", attributes["href"])
+        css = client.get_linked(css_url, "/").decode()
+        for url in CSS_URL.findall(css):
+            client.get_linked(url, css_url)
+
+    start = time.perf_counter()
+    client.request("POST", result_path, FORM)
+    return time.perf_counter() - start
+
+
+def baseline_app(static_folder):
+    """The app as it was before the asset pipeline, with index.html and static/ from git.
+
+    Only the page and the static files are old, the calculation is today's.
+    """
+    added = subprocess.run(
+        ["git", "log", "--diff-filter=A", "--format=%H", "--", "assets.py"],
+        cwd=HERE, capture_output=True, text=True, check=True
+    ).stdout.split()
+    if not added:
+        raise SystemExit("assets.py isn't in the git history, no baseline to compare to.")
+    baseline = f"{added[-1]}~1"
+
+    def show(path):
+        return subprocess.run(["git", "show", f"{baseline}:{path}"],
+                              cwd=HERE, capture_output=True, check=True).stdout
+
+    static_files = subprocess.run(
+        ["git", "ls-tree", "-r", "--name-only", baseline, "static"],
+        cwd=HERE, capture_output=True, text=True, check=True
+    ).stdout.split()
+    for path in static_files:
+        target = os.path.join(static_folder, os.path.relpath(path, "static"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(show(path))
+
+    app = Flask(__name__, static_folder=static_folder, static_url_path="/static")
+    app.jinja_loader = DictLoader({"index.html": show("templates/index.html").decode()})
+
+    @app.route('/', methods=['GET', 'POST'])
+    def home():
+        context = calculate(request.form) if request.method == 'POST' else {}
+        return render_template('index.html', **context)
+
+    return app
+
+
+def measure(port, result_path, runs):
+    """Median bytes, requests, result bytes and time-to-result of a first and a repeat visit."""
+    results = {"first": [], "repeat": []}
+    external = set()
+    for _ in range(runs):
+        client = Client(port)
+        for visit_name in results:
+            client.transferred = client.requests = 0
+            time_to_result = visit(client, result_path)
+            results[visit_name].append((client.transferred, client.requests, client.last_size,
+                                        time_to_result * 1000))
+        external |= client.external
+    medians = {
+        visit_name: [statistics.median(values) for values in zip(*rows)]
+        for visit_name, rows in results.items()
+    }
+    return medians, external
+
+
+def serve(app):
+    """Serve app on a free local port, in a background thread."""
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page and asset delivery.")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as static_folder:
+        scenarios = (
+            ("before", serve(baseline_app(static_folder)), "/"),
+            ("after", serve(create_app({"PRELOAD": True})), "/results"),
+        )
+
+        print(f"{'':<7} {'visit':<7} {'bytes':>7} {'requests':>9} {'result bytes':>13} "
+              f"{'time-to-result':>15} {f'@ {SLOW_LINK_KBPS} kbit/s':>15}   (median of {args.runs} runs)")
+        not_measured = {}
+        for name, server, result_path in scenarios:
+            medians, external = measure(server.port, result_path, args.runs)
+            for visit_name, row in medians.items():
+                transferred, requests, result_size, ms = row
+                slow_ms = ms + result_size * 8 / SLOW_LINK_KBPS
+                print(f"{name:<7} {visit_name:<7} {transferred:7.0f} {requests:9.0f} {result_size:13.0f} "
+                      f"{ms:12.2f} ms {slow_ms:12.1f} ms")
+            if external:
+                not_measured[name] = external
+            server.shutdown()
+
+        for name, urls in not_measured.items():
+            print(f"\nNot measured, {name} also loads from other hosts:")
+            for url in sorted(urls):
+                print(f"    {url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+filename: bench_startup.py
+--------------------------
+
+Cold start benchmark for the Bread Buddy app. Every run is a fresh Python
+process, like a container that just scaled out:
+
+    import    -- `python -X importtime -c "import app"`, slowest imports
+    lazy      -- create_app(), models and templates load on the first request
+    compiled  -- lazy, with templates from `flask compile-templates`
+    preload   -- create_app() loads everything before the first request
+    forked    -- a preloaded parent forks, the child serves the first request
+
+Usage:
+    python bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TOP_IMPORTS = 8
+
+# Runs in a fresh process, prints startup and first request times in ms.
+CHILD = """
+import json, os, sys, time
+start = time.perf_counter()
+import app
+flask_app = app.create_app(json.loads(sys.argv[1]))
+client = flask_app.test_client()
+ready = time.perf_counter()
+
+if sys.argv[2] == "forked":
+    read, write = os.pipe()
+    if os.fork() == 0:
+        forked = time.perf_counter()
+        client.get("/")
+        os.write(write, str((time.perf_counter() - forked) * 1000).encode())
+        os._exit(0)
+    os.wait()
+    first_request = float(os.read(read, 64))
+else:
+    before = time.perf_counter()
+    client.get("/")
+    first_request = (time.perf_counter() - before) * 1000
+
+print(json.dumps({"startup": (ready - start) * 1000, "first_request": first_request}))
+"""
+
+
+def import_times():
+    """Cumulative import time of every module imported by app.py, slowest first."""
+    run = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=HERE, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in run.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Nested imports are indented by 2 spaces per level and printed before their parent.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            times[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            if name.strip() == "app":
+                break
+            times = {}
+    return sorted(times.items(), key=lambda item: item[1], reverse=True)
+
+
+def measure(config, mode, runs):
+    """Median startup and first request time over `runs` fresh processes."""
+    results = []
+    for _ in range(runs):
+        run = subprocess.run(
+            [sys.executable, "-c", CHILD, json.dumps(config), mode],
+            cwd=HERE, capture_output=True, text=True, check=True
+        )
+        results.append(json.loads(run.stdout))
+    return {
+        key: statistics.median(result[key] for result in results)
+        for key in ("startup", "first_request")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Bread Buddy cold starts.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = import_times()
+    print(f"import app: {sum(ms for _, ms in imports):.1f} ms, slowest imports:")
+    for name, ms in imports[:TOP_IMPORTS]:
+        print(f"  {name:<30} {ms:8.1f} ms")
+    print()
+
+    with tempfile.TemporaryDirectory() as compiled:
+        subprocess.run(
+            [sys.executable, "-m", "flask", "--app", "app", "compile-templates", compiled],
+            cwd=HERE, capture_output=True, check=True
+        )
+        modes = {
+            "lazy": ({}, "fresh"),
+            "compiled": ({"PRECOMPILED_TEMPLATES": compiled}, "fresh"),
+            "preload": ({"PRELOAD": True}, "fresh"),
+            "forked": ({"PRELOAD": True}, "forked"),
+        }
+        print(f"{'mode':<10} {'startup':>12} {'1st request':>12}   (median of {args.runs} runs)")
+        for mode, (config, kind) in modes.items():
+            result = measure(config, kind, args.runs)
+            print(f"{mode:<10} {result['startup']:9.1f} ms {result['first_request']:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+filename: fetch_fonts.py
+------------------------
+
+Builds the self-hosted Newsreader font in static/fonts/, so the app doesn't
+need a font CDN (and still looks right offline).
+
+The source is the variable font from the Google Fonts repository
+(github.com/google/fonts, ofl/newsreader). Every style is cut down to what
+the page can show:
+
+    - glyphs: printable ASCII (numbers, ingredient names and error messages
+      come from the server) plus every other character in templates/ and
+      models/, eg. the ° of the water temperature
+    - styles: only STYLES, the page has no italic text
+    - weights: only WEIGHTS, the page uses regular and bold
+    - optical size: fixed at OPTICAL_SIZE, the size of the body text.
+      Headings get the same drawing, only larger. Less than half the bytes.
+
+Next to the .woff2 files, this writes newsreader.css with an @font-face rule
+per style. The page only links that stylesheet when it exists. Commit the
+whole static/fonts/ folder, and run this again when the templates get
+characters that aren't in the font yet.
+
+Needs fontTools and brotli: pip install fonttools brotli
+
+Usage:
+    python fetch_fonts.py
+    python fetch_fonts.py --source path/to/folder/with/the/ttf/files
+"""
+
+import argparse
+import glob
+import io
+import os
+import urllib.parse
+import urllib.request
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+except ImportError:
+    raise SystemExit("fetch_fonts.py needs fontTools and brotli: pip install fonttools brotli")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE_URL = "https://github.com/google/fonts/raw/main/ofl/newsreader/"
+# Font style -> variable font file in the Google Fonts repository. The page has
+# no italic text, add "italic": "Newsreader-Italic[opsz,wght].ttf" when it does.
+STYLES = {
+    "normal": "Newsreader[opsz,wght].ttf",
+}
+LICENSE = "OFL.txt"
+WEIGHTS = (400, 700)
+OPTICAL_SIZE = 16
+TEXT_SOURCES = ("templates/*.html", "models/*.py", "app.py")
+FONTS_FOLDER = os.path.join(HERE, "static", "fonts")
+FONT_FACE_CSS = "newsreader.css"
+WOFF2_SIGNATURE = b"wOF2"
+
+
+def read_source(source, name):
+    """Bytes of a file from the source folder, or from the Google Fonts repository."""
+    if source:
+        with open(os.path.join(source, name), "rb") as f:
+            return f.read()
+    with urllib.request.urlopen(SOURCE_URL + urllib.parse.quote(name)) as response:
+        return response.read()
+
+
+def page_characters():
+    """Every character the page could show: printable ASCII and the rest of the source text."""
+    characters = {chr(code) for code in range(0x20, 0x7f)}
+    for pattern in TEXT_SOURCES:
+        for path in glob.glob(os.path.join(HERE, pattern)):
+            with open(path, encoding="utf-8") as f:
+                characters.update(c for c in f.read() if c.isprintable() and c != "\ufeff")
+    return "".join(sorted(characters))
+
+
+def unicode_range(codepoints):
+    """CSS unicode-range for a set of code points, eg. U+20-7E, U+B0."""
+    ranges = []
+    for codepoint in sorted(codepoints):
+        if ranges and ranges[-1][1] == codepoint - 1:
+            ranges[-1][1] = codepoint
+        else:
+            ranges.append([codepoint, codepoint])
+    return ", ".join(
+        f"U+{start:X}" if start == end else f"U+{start:X}-{end:X}" for start, end in ranges
+    )
+
+
+def build_font(data, text):
+    """Variable font limited to WEIGHTS, OPTICAL_SIZE and the glyphs for text, as woff2.
+
+    Returns:
+        tuple: (woff2 bytes, code points in the font)
+    """
+    font = TTFont(io.BytesIO(data))
+    font = instancer.instantiateVariableFont(font, {"wght": WEIGHTS, "opsz": OPTICAL_SIZE})
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.name_IDs = ["*"]
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+
+    output = io.BytesIO()
+    font.flavor = "woff2"
+    font.save(output)
+    return output.getvalue(), set(font.getBestCmap())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the self-hosted Newsreader font.")
+    parser.add_argument("--source", default=None,
+                        help="Folder with the Newsreader .ttf files and OFL.txt. Default: download them.")
+    args = parser.parse_args()
+
+    text = page_characters()
+    os.makedirs(FONTS_FOLDER, exist_ok=True)
+    font_faces = []
+
+    for style, name in STYLES.items():
+        source = read_source(args.source, name)
+        font, codepoints = build_font(source, text)
+        if not font.startswith(WOFF2_SIGNATURE):
+            raise ValueError(f"{name} didn't turn into a woff2 font.")
+
+        file_name = f"newsreader-{style}.woff2"
+        with open(os.path.join(FONTS_FOLDER, file_name), "wb") as f:
+            f.write(font)
+        print(f"{file_name}: {len(source) / 1024:.1f} KB -> {len(font) / 1024:.1f} KB, "
+              f"{len(codepoints)} characters")
+
+        font_faces.append(
+            "@font-face {\n"
+            "    font-family: \"Newsreader\";\n"
+            f"    font-style: {style};\n"
+            f"    font-weight: {WEIGHTS[0]} {WEIGHTS[1]};\n"
+            "    font-display: swap;\n"
+            f"    src: url(\"{file_name}\") format(\"woff2\");\n"
+            f"    unicode-range: {unicode_range(codepoints)};\n"
+            "}\n"
+        )
+
+    # The OFL asks for the license to travel with the fonts.
+    with open(os.path.join(FONTS_FOLDER, LICENSE), "wb") as f:
+        f.write(read_source(args.source, LICENSE))
+
+    with open(os.path.join(FONTS_FOLDER, FONT_FACE_CSS), "w") as f:
+        f.write("/* Newsreader (SIL Open Font License, see OFL.txt), written by fetch_fonts.py */\n")
+        f.write("\n".join(font_faces))
+    print(f"{FONT_FACE_CSS}: {len(font_faces)} @font-face rule(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+filename: __init__.py
+---------------------
+
+The Bread Buddy models. Classes are only imported when they're first used,
+so `import models` stays cheap:
+
+    import models
+    recipe = models.Recipe("My Loaf")   # imports models.recipe here
+
+"""
+
+import importlib
+
+# Class name -> module that holds it.
+_LAZY_CLASSES = {
+    "Ingredient": ".ingredient",
+    "Recipe": ".recipe",
+    "Levain": ".levain",
+    "Dough": ".dough",
+    "WeighingSession": ".weighing",
+    "FeedingLedger": ".ledger",
+}
+
+__all__ = list(_LAZY_CLASSES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_CLASSES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_CLASSES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+def load_all():
+    """ Import every model now, eg. in a parent process before forking workers."""
+    for name in _LAZY_CLASSES:
+        __getattr__(name)
@@ -7,8 +7,12 @@ All temperatures units used are in Celcius, but can be converted using utils.cel
 
 """
 
+import math
+import random
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-import utils
+from . import utils
 
 FERMENTATION_ADJUSTMENT_FACTOR = 1.12
 WATER_TEMP_MULTIPLIER = 4
@@ -21,6 +25,54 @@ DEFAULT_LEVAIN_TEMP = 22
 DEFAULT_AMBIENT_TEMP = 22
 DEFAULT_REFERENCE_TEMP = 21
 
+# Monte Carlo fermentation simulation
+FLOUR_TEMP_SPREAD = 1.5     # standard deviation in °C
+LEVAIN_TEMP_SPREAD = 1.0
+AMBIENT_TEMP_SPREAD = 1.5
+LEVAIN_STRENGTH_SPREAD = 0.15   # 1.0 is a levain at its usual strength
+MIN_LEVAIN_STRENGTH = 0.2
+SIMULATION_SHARD_SIZE = 50_000
+
+
+def fermentation_hours(base_hours, reference_temp, ambient_temp):
+    """ Fermentation time in decimal hours, adjusted for temperature."""
+    # For every 1°C change, fermentation time changes by ~10-15%
+    return base_hours * FERMENTATION_ADJUSTMENT_FACTOR ** (reference_temp - ambient_temp)
+
+
+def dough_temperature(water_temp, flour_temp, levain_temp, ambient_temp, friction_factor=0):
+    """ Dough temperature after mixing. The water temperature formula, the other way around."""
+    return (water_temp + flour_temp + levain_temp + ambient_temp + friction_factor) / WATER_TEMP_MULTIPLIER
+
+
+def _simulate_shard(shard):
+    """ Bulk fermentation hours for one shard of samples. Runs in a worker process.
+
+    Args:
+        shard: Tuple (seed, shard number, samples, model settings dict).
+
+    Returns:
+        list[float]: Bulk fermentation time of every sample, in hours.
+    """
+    seed, number, samples, settings = shard
+    # Seeding on the shard number keeps results the same for any number of workers.
+    rng = random.Random(f"{seed}:{number}")
+    hours = []
+
+    for _ in range(samples):
+        flour_temp = rng.gauss(settings["flour_temp"], FLOUR_TEMP_SPREAD)
+        levain_temp = rng.gauss(settings["levain_temp"], LEVAIN_TEMP_SPREAD)
+        ambient_temp = rng.gauss(settings["ambient_temp"], AMBIENT_TEMP_SPREAD)
+        strength = max(rng.gauss(1, LEVAIN_STRENGTH_SPREAD), MIN_LEVAIN_STRENGTH)
+
+        dough_temp = dough_temperature(settings["water_temp"], flour_temp, levain_temp,
+                                       ambient_temp, settings["friction_factor"])
+        room_adjusted = fermentation_hours(settings["base_hours"], settings["reference_temp"], ambient_temp)
+        # A dough that came out of the mix colder than planned ferments slower, and vice versa.
+        hours.append(fermentation_hours(room_adjusted, settings["target_temp"], dough_temp) / strength)
+
+    return hours
+
 
 
 class Dough:
@@ -101,11 +153,8 @@ class Dough:
         if base_hours <= 0:
             raise ValueError("Negative fermentation time? We can't go back in time... yet!\n")
 
-        temp_difference = reference_temp - ambient_temp
-        # For every 1°C change, fermentation time changes by ~10-15%
-        adjustment_factor = FERMENTATION_ADJUSTMENT_FACTOR ** temp_difference
         # TODO: adjustment_factor for °F.
-        adjusted_time_hours = base_hours * adjustment_factor
+        adjusted_time_hours = fermentation_hours(base_hours, reference_temp, ambient_temp)
 
         return {
             "base_time": utils.decimal_hours_to_time(base_hours),
@@ -114,6 +163,91 @@ class Dough:
             "ambient_temp": ambient_temp
         }
 
+    def simulate_fermentation(self, deadline: datetime, start: datetime=None, base_hours=4,
+        reference_temp: float=DEFAULT_REFERENCE_TEMP, target_temp=DEFAULT_DDT,
+        flour_temp=DEFAULT_FLOUR_TEMP, levain_temp=DEFAULT_LEVAIN_TEMP,
+        ambient_temp=DEFAULT_AMBIENT_TEMP, friction_factor=0,
+        samples: int=100_000, seed: int=0, workers: int=None, percentiles=(5, 50, 95)):
+        """Simulates bulk fermentation with varying temperatures and levain strength.
+
+        The water temperature is calculated once from the expected temperatures,
+        like a baker would. Then flour, levain and room temperature and levain
+        strength are sampled around their expected values, and every sample runs
+        through the water temperature and fermentation time model.
+
+        Args:
+            deadline: Time bulk fermentation has to be done, eg. for an oven slot.
+            start: Time of mixing. Default now.
+            base_hours: Fermentation time at reference temp, in hours. Default 4.
+            reference_temp: Recipe's designed temperature in Celsius. Default 21°C.
+            target_temp: Desired dough temperature. Default 25°C.
+            flour_temp: Expected flour temperature. Default 22°C.
+            levain_temp: Expected levain temperature. Default 22°C.
+            ambient_temp: Expected room temperature. Default 22°C.
+            friction_factor: Heat from mixing. Default 0.
+            samples: Number of simulated doughs. Default 100 000.
+            seed: Seed for the random generator, same seed gives same results. Default 0.
+            workers: Number of processes. Default: one per CPU.
+            percentiles: Percentiles of the completion time to return, 0 to 100. Default (5, 50, 95).
+
+        Returns:
+            dict: Duration and end datetime per percentile, deadline and chance to miss it.
+        """
+        if samples <= 0:
+            raise ValueError("We need at least one dough to simulate.\n")
+        if any(not 0 <= pct <= 100 for pct in percentiles):
+            raise ValueError(f"Percentiles should be between 0 and 100. (got {percentiles})")
+        if base_hours <= 0:
+            raise ValueError("Negative fermentation time? We can't go back in time... yet!\n")
+
+        start = start or datetime.now()
+        water_temp = self.calculate_water_temperature(target_temp, flour_temp, levain_temp,
+                                                      ambient_temp, friction_factor)["water_temp"]
+        settings = {
+            "water_temp": water_temp,
+            "base_hours": base_hours,
+            "reference_temp": reference_temp,
+            "target_temp": target_temp,
+            "flour_temp": flour_temp,
+            "levain_temp": levain_temp,
+            "ambient_temp": ambient_temp,
+            "friction_factor": friction_factor
+        }
+        shards = [
+            (seed, number, min(SIMULATION_SHARD_SIZE, samples - offset), settings)
+            for number, offset in enumerate(range(0, samples, SIMULATION_SHARD_SIZE))
+        ]
+
+        hours = []
+        if len(shards) == 1 or workers == 1:
+            for shard in shards:
+                hours.extend(_simulate_shard(shard))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for shard_hours in pool.map(_simulate_shard, shards):
+                    hours.extend(shard_hours)
+        hours.sort()
+
+        hours_to_deadline = (deadline - start).total_seconds() / 3600
+        missed = len(hours) - bisect_right(hours, hours_to_deadline)
+
+        completion = {}
+        for pct in percentiles:
+            # Nearest-rank percentile
+            pct_hours = hours[max(math.ceil(pct / 100 * len(hours)) - 1, 0)]
+            completion[pct] = {
+                "duration": utils.decimal_hours_to_time(pct_hours),
+                "end": start + timedelta(hours=pct_hours)
+            }
+
+        return {
+            "samples": samples,
+            "water_temp": water_temp,
+            "completion": completion,
+            "deadline": deadline,
+            "miss_probability": round(missed / samples, 4)
+        }
+
     def schedule_autolyse(self, duration_minutes=30):
         """Calculates autolyse rest period start and end times.
     
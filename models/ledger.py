@@ -0,0 +1,384 @@
+"""
+filename: ledger.py
+-------------------
+
+This file contains the FeedingLedger class. An append-only log of every
+Levain feeding, to find the best feeding_ratio for each starter over time.
+
+On disk, the ledger is a directory with one sub directory per month.
+Every column lives in its own binary file, so a query only reads the
+months and columns it needs:
+
+    ledger/
+        levains.json        -- levain names, stored as ids in the columns
+        2026-10/
+            timestamp.bin
+            peak_hours.bin
+            ...
+
+Old months can be compacted to one row per levain, ratio and day.
+
+Writers take a lock on ledger/.lock, so several processes can record at the
+same time. Readers share a lock on it, so they never read a month while it's
+swapped for its compacted version. A row that was only partly written (eg.
+after a crash) is ignored when reading, and cut off before the next write to
+that month. A compaction that crashed half way is finished or rolled back
+when the ledger is opened, and before every write. The lock needs fcntl, on
+systems without it only use one writer at a time and don't read while
+compacting.
+
+"""
+
+import json
+import math
+import os
+import shutil
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Column name -> array typecode.
+COLUMNS = {
+    "timestamp": "d",
+    "levain": "H",
+    "count": "I",           # number of feedings in a row, > 1 after compaction
+    "flour_ratio": "f",
+    "water_ratio": "f",
+    "starter_ratio": "f",
+    "flour_weight": "f",
+    "water_weight": "f",
+    "starter_weight": "f",
+    "levain_temp": "f",
+    "ambient_temp": "f",
+    "rise": "f",            # height at peak / height after feeding, eg. 2.5
+    "peak_hours": "f",      # hours from feeding to peak
+}
+MEASUREMENTS = ("flour_weight", "water_weight", "starter_weight",
+                "levain_temp", "ambient_temp", "rise", "peak_hours")
+# Every measurement keeps how many feedings it was measured in, eg. "peak_hours_count".
+# Means of compacted rows are weighted by it, not by count.
+COLUMNS.update({f"{column}_count": "I" for column in MEASUREMENTS})
+RATIO_COLUMNS = ("flour_ratio", "water_ratio", "starter_ratio")
+MONTH_FORMAT = "%Y-%m"
+
+
+class FeedingLedger:
+    """ Append-only, columnar store of Levain feedings.
+
+    Missing measurements are stored as NaN and skipped by aggregates.
+
+    Args:
+        path: Directory of the ledger, created when missing.
+
+    Examples:
+        >>> ledger = FeedingLedger("ledger")
+        >>> levy = Levain("Levy")
+        >>> ledger.record(levy, levy.calculate_feeding(220), peak_hours=5.5)
+        >>> ledger.aggregate("peak_hours")
+        {('2026-10', (1.0, 1.0, 0.2)): 5.5}
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._levains_file = os.path.join(path, "levains.json")
+        self._lock_file = os.path.join(path, ".lock")
+        self.levains = []
+        with self._locked():
+            self._recover()
+            self._load_levains()
+
+    def __str__(self):
+        return f"FeedingLedger({self.path})"
+
+    def __repr__(self):
+        return f"FeedingLedger(path={self.path!r}, months={self.months()})"
+
+    @contextmanager
+    def _locked(self, shared=False):
+        """ Hold the writer lock of the ledger, or share it with other readers."""
+        with open(self._lock_file, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load_levains(self):
+        """ Reload levain names, another process may have added some."""
+        if os.path.exists(self._levains_file):
+            with open(self._levains_file) as f:
+                self.levains = json.load(f)
+
+    def _levain_id(self, name):
+        """ Id of a levain name, new names are added to levains.json. Call with the lock held."""
+        self._load_levains()
+        if name not in self.levains:
+            self.levains.append(name)
+            tmp_file = f"{self._levains_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(self.levains, f)
+            os.replace(tmp_file, self._levains_file)
+        return self.levains.index(name)
+
+    def _recover(self):
+        """ Finish or roll back a compaction that stopped half way. Call with the lock held."""
+        for entry in os.listdir(self.path):
+            if not entry.endswith(".old.tmp"):
+                continue
+            month_dir = os.path.join(self.path, entry.removesuffix(".old.tmp"))
+            if os.path.exists(month_dir):
+                # The compacted month is in place, only the old one is left.
+                shutil.rmtree(os.path.join(self.path, entry))
+            else:
+                os.rename(os.path.join(self.path, entry), month_dir)
+        # Compacted months that never got swapped in.
+        for entry in os.listdir(self.path):
+            if entry.endswith(".tmp") and os.path.isdir(os.path.join(self.path, entry)):
+                shutil.rmtree(os.path.join(self.path, entry))
+
+    def months(self):
+        """ All months in the ledger, oldest first."""
+        return sorted(
+            entry for entry in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, entry))
+            and not entry.endswith(".tmp")
+        )
+
+    def record(self, levain, feeding: dict, timestamp: datetime=None,
+               levain_temp: float=None, ambient_temp: float=None,
+               rise: float=None, peak_hours: float=None):
+        """ Append one feeding.
+
+        Args:
+            levain: The fed Levain.
+            feeding: Weights as returned by Levain.calculate_feeding().
+            timestamp: Time of feeding. Default now.
+            levain_temp: Levain temperature in Celsius.
+            ambient_temp: Room temperature in Celsius.
+            rise: Peak height / height after feeding.
+            peak_hours: Hours from feeding to peak.
+        """
+        timestamp = timestamp or datetime.now()
+        with self._locked():
+            self._recover()
+            self._append(levain, feeding, timestamp, levain_temp, ambient_temp, rise, peak_hours)
+
+    def _append(self, levain, feeding, timestamp, levain_temp, ambient_temp, rise, peak_hours):
+        """ Write one row to every column of its month. Call with the lock held."""
+        flour_ratio, water_ratio, starter_ratio = levain.feeding_ratio
+        row = {
+            "timestamp": timestamp.timestamp(),
+            "levain": self._levain_id(levain.name),
+            "count": 1,
+            "flour_ratio": flour_ratio,
+            "water_ratio": water_ratio,
+            "starter_ratio": starter_ratio,
+            "flour_weight": feeding["flour_weight"],
+            "water_weight": feeding["water_weight"],
+            "starter_weight": feeding["starter_weight"],
+            "levain_temp": levain_temp,
+            "ambient_temp": ambient_temp,
+            "rise": rise,
+            "peak_hours": peak_hours,
+        }
+        for column in MEASUREMENTS:
+            row[f"{column}_count"] = 0 if row[column] is None else 1
+
+        month = timestamp.strftime(MONTH_FORMAT)
+        month_dir = os.path.join(self.path, month)
+        os.makedirs(month_dir, exist_ok=True)
+        self._repair(month)
+        for column, typecode in COLUMNS.items():
+            value = row[column]
+            with open(os.path.join(month_dir, f"{column}.bin"), "ab") as f:
+                array(typecode, [math.nan if value is None else value]).tofile(f)
+
+    def _column_length(self, month, column):
+        """ Number of values in one column file."""
+        file = os.path.join(self.path, month, f"{column}.bin")
+        if not os.path.exists(file):
+            return 0
+        return os.path.getsize(file) // array(COLUMNS[column]).itemsize
+
+    def _complete_rows(self, month):
+        """ Number of rows that made it into every column of a month."""
+        return min(self._column_length(month, column) for column in COLUMNS)
+
+    def _repair(self, month):
+        """ Cut off a partly written last row, so new rows line up again. Call with the lock held."""
+        rows = self._complete_rows(month)
+        for column, typecode in COLUMNS.items():
+            if self._column_length(month, column) > rows:
+                file = os.path.join(self.path, month, f"{column}.bin")
+                os.truncate(file, rows * array(typecode).itemsize)
+
+    def _read_column(self, month, column, rows):
+        """ Load the first `rows` values of one column of one month."""
+        values = array(COLUMNS[column])
+        if rows:
+            with open(os.path.join(self.path, month, f"{column}.bin"), "rb") as f:
+                values.fromfile(f, rows)
+        return values
+
+    def _months_between(self, start, end):
+        """ Months that can hold feedings between start and end."""
+        first = start.strftime(MONTH_FORMAT) if start else None
+        last = end.strftime(MONTH_FORMAT) if end else None
+        return [
+            month for month in self.months()
+            if (first is None or month >= first) and (last is None or month <= last)
+        ]
+
+    def _rows(self, columns, start=None, end=None, levain=None):
+        """ Yield (month, row dict) for feedings in [start, end), only reading the given columns."""
+        needed = list(dict.fromkeys(["timestamp", "levain", *columns]))
+        # Read everything under the shared lock, so a compaction can't swap a
+        # month underneath. It's released before the first row is yielded.
+        with self._locked(shared=True):
+            self._load_levains()
+            months = {
+                month: {column: self._read_column(month, column, self._complete_rows(month))
+                        for column in needed}
+                for month in self._months_between(start, end)
+            }
+
+        levain_id = None
+        if levain is not None:
+            if levain not in self.levains:
+                return
+            levain_id = self.levains.index(levain)
+
+        start_ts = start.timestamp() if start else -math.inf
+        end_ts = end.timestamp() if end else math.inf
+
+        for month, data in months.items():
+            for i, timestamp in enumerate(data["timestamp"]):
+                if not start_ts <= timestamp < end_ts:
+                    continue
+                if levain_id is not None and data["levain"][i] != levain_id:
+                    continue
+                yield month, {column: data[column][i] for column in needed}
+
+    def feedings(self, start: datetime=None, end: datetime=None, levain: str=None):
+        """ All feedings in a time range.
+
+        Args:
+            start: First time to include. Default: from the beginning.
+            end: First time to exclude. Default: up to the last feeding.
+            levain: Only feedings of this levain name. Default all.
+
+        Returns:
+            list[dict]: One dict per (compacted) feeding, oldest month first.
+        """
+        rows = []
+        for _, row in self._rows(COLUMNS, start, end, levain):
+            row["timestamp"] = datetime.fromtimestamp(row["timestamp"])
+            row["levain"] = self.levains[row["levain"]]
+            for column in RATIO_COLUMNS:
+                row[column] = round(row[column], 3)
+            for column in MEASUREMENTS:
+                if not row.pop(f"{column}_count"):
+                    row[column] = None
+            rows.append(row)
+        return rows
+
+    def aggregate(self, column: str, start: datetime=None, end: datetime=None,
+                  levain: str=None):
+        """ Mean of a measurement per month and feeding ratio.
+
+        Usage:
+            Mean peak time per ratio per month
+            ledger.aggregate("peak_hours", levain="Levy")
+
+        Returns:
+            dict: {(month, (flour, water, starter)): mean}
+        """
+        if column not in MEASUREMENTS:
+            raise ValueError(f"Column must be one of {MEASUREMENTS}. (got {column})")
+
+        totals = {}
+        measured = f"{column}_count"
+        for month, row in self._rows((column, measured, *RATIO_COLUMNS), start, end, levain):
+            if not row[measured]:
+                continue
+            ratio = tuple(round(row[name], 3) for name in RATIO_COLUMNS)
+            total, count = totals.get((month, ratio), (0.0, 0))
+            totals[(month, ratio)] = (total + row[column] * row[measured], count + row[measured])
+
+        return {key: round(total / count, 2) for key, (total, count) in totals.items()}
+
+    def compact(self, before: datetime):
+        """ Downsample all months before the month of `before`.
+
+        Feedings of the same levain, ratio and day are merged into one row,
+        with the mean of every measurement, the number of feedings in count
+        and the number of feedings with that measurement in <measurement>_count.
+
+        Returns:
+            int: Number of compacted months.
+        """
+        with self._locked():
+            self._recover()
+            return self._compact(before)
+
+    def _compact(self, before):
+        """ See compact(). Call with the lock held."""
+        compacted = 0
+        for month in self.months():
+            if month >= before.strftime(MONTH_FORMAT):
+                break
+
+            complete = self._complete_rows(month)
+            data = {column: self._read_column(month, column, complete) for column in COLUMNS}
+            groups = {}
+            for i, timestamp in enumerate(data["timestamp"]):
+                day = datetime.fromtimestamp(timestamp).replace(
+                    hour=0, minute=0, second=0, microsecond=0).timestamp()
+                key = (day, data["levain"][i], data["flour_ratio"][i],
+                       data["water_ratio"][i], data["starter_ratio"][i])
+                groups.setdefault(key, []).append(i)
+
+            if len(groups) == len(data["timestamp"]):
+                continue
+
+            tmp_dir = os.path.join(self.path, f"{month}.tmp")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            merged = {column: array(typecode) for column, typecode in COLUMNS.items()}
+            for (day, levain_id, flour, water, starter), rows in sorted(groups.items()):
+                counts = [data["count"][i] for i in rows]
+                merged["timestamp"].append(day)
+                merged["levain"].append(levain_id)
+                merged["count"].append(sum(counts))
+                merged["flour_ratio"].append(flour)
+                merged["water_ratio"].append(water)
+                merged["starter_ratio"].append(starter)
+                for column in MEASUREMENTS:
+                    measured = [(data[column][i], data[f"{column}_count"][i]) for i in rows
+                                if data[f"{column}_count"][i]]
+                    total = sum(n for _, n in measured)
+                    merged[column].append(
+                        sum(value * n for value, n in measured) / total if total else math.nan
+                    )
+                    merged[f"{column}_count"].append(total)
+
+            for column, values in merged.items():
+                with open(os.path.join(tmp_dir, f"{column}.bin"), "wb") as f:
+                    values.tofile(f)
+
+            # Swap the month directory for the compacted one.
+            month_dir = os.path.join(self.path, month)
+            old_dir = os.path.join(self.path, f"{month}.old.tmp")
+            os.rename(month_dir, old_dir)
+            os.rename(tmp_dir, month_dir)
+            shutil.rmtree(old_dir)
+            compacted += 1
+
+        return compacted
@@ -9,6 +9,8 @@ A Recipe is a container Class for Ingredients.
 
 from .ingredient import Ingredient
 
+WATER_HOLD_BACK_RATIO = 0.10
+
 class Recipe:
     """ An Ingredient in a bread recipe.
 
@@ -87,10 +89,29 @@ class Recipe:
             return 0
         return round((self.total_liquid_weight / flour) * 100, 1)
 
-    def divide_water():
-        # Idea to divide water, never pour total water at once,
-        # keep about 10% on the side to add after if needed.
-        pass
+    def divide_water(self, hold_back_ratio: float=WATER_HOLD_BACK_RATIO):
+        """ Split the recipe water into a main pour and a held-back part.
+
+        Never pour the total water at once, keep about 10% on the side
+        to add after mixing if the dough needs it.
+
+        Args:
+            hold_back_ratio: Part of the water to keep aside. Default 0.10 (10%).
+
+        Returns:
+            dict: Total, main and held-back water weights in grams.
+        """
+        if hold_back_ratio < 0 or hold_back_ratio >= 1:
+            raise ValueError(f"Hold back ratio should be between 0 and 1. (got {hold_back_ratio})")
+
+        water = sum(ingredient.weight for ingredient in self.ingredients if ingredient.category == 'water')
+        held_back = round(water * hold_back_ratio, 1)
+
+        return {
+            "water_weight": round(water, 1),
+            "main_water": round(water - held_back, 1),
+            "held_back_water": held_back
+        }
 
     def validate(self):
         """ Check dough viability.
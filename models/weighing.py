@@ -0,0 +1,198 @@
+"""
+filename: weighing.py
+---------------------
+
+This file contains the WeighingSession class. A WeighingSession follows
+the live readings of one bench scale while a Recipe is being weighed out.
+
+Every reading only updates the ingredient that is on the scale, so the
+work per reading stays the same, no matter how big the recipe is.
+
+"""
+
+import math
+import queue
+import threading
+
+from .recipe import Recipe, WATER_HOLD_BACK_RATIO
+
+# Updates a subscriber can fall behind. After that the oldest are dropped,
+# a scale display only needs the latest state.
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+class WeighingSession:
+    """ Live weighing of a Recipe on one scale.
+
+    Keeps the target and added weight of every ingredient, together with
+    running totals for flour and liquid. Readings are the (tared) weight of
+    the ingredient that is currently on the scale.
+
+    Args:
+        recipe: Recipe to weigh out.
+        hold_back_ratio: Part of the water to keep aside. Default 0.10 (10%).
+
+    Examples:
+        >>> recipe = Recipe.from_bakers_percentage("Loaf", 1000, {"water": 0.70})
+        >>> session = WeighingSession(recipe)
+        >>> session.add_reading("water", 500)["water_split"]["main_remaining"]
+        130.0
+    """
+    def __init__(self, recipe: Recipe, hold_back_ratio: float=WATER_HOLD_BACK_RATIO):
+        self.recipe = recipe
+        self.water_split = recipe.divide_water(hold_back_ratio)
+        self.ingredients = {}
+        self._flour_weight = 0.0
+        self._liquid_weight = 0.0
+        self._water_weight = 0.0
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self.closed = False
+
+        for ingredient in recipe.ingredients:
+            tracked = self.ingredients.setdefault(ingredient.name, {
+                "category": ingredient.category,
+                "target": 0.0,
+                "added": 0.0,
+                # Part of the ingredient weight that counts as liquid.
+                "liquid_part": self._liquid_part(ingredient),
+            })
+            tracked["target"] += ingredient.weight
+
+    def __str__(self):
+        return f"WeighingSession({self.recipe.name})"
+
+    def __repr__(self):
+        return f"WeighingSession(recipe={self.recipe.name!r}, ingredients={list(self.ingredients)})"
+
+    @staticmethod
+    def _liquid_part(ingredient):
+        """ Same liquid rules as Recipe.total_liquid_weight."""
+        if ingredient.category == 'water':
+            return 1.0
+        if ingredient.category == 'starter':
+            hydration = ingredient.starter_hydration / 100
+            return hydration / (1 + hydration)
+        return 0.0
+
+    @property
+    def hydration(self):
+        """ Hydration of what is already weighed out, like Recipe.hydration_percentage."""
+        if self._flour_weight == 0:
+            return 0
+        return round((self._liquid_weight / self._flour_weight) * 100, 1)
+
+    def add_reading(self, ingredient_name: str, weight: float):
+        """ Process one scale reading.
+
+        Args:
+            ingredient_name: Name of the ingredient on the scale.
+            weight: Weight on the scale in grams.
+
+        Raises:
+            ValueError: if the ingredient isn't in the recipe or weight is negative or not a number.
+
+        Returns:
+            dict: Status of the ingredient, hydration so far and water split.
+        """
+        if ingredient_name not in self.ingredients:
+            raise ValueError(f"'{ingredient_name}' isn't in this recipe. Wrong bucket?")
+        if not math.isfinite(weight):
+            raise ValueError(f"Weight must be a number. (got {weight})")
+        if weight < 0:
+            raise ValueError(f"Weight cannot be negative. (got {weight})")
+
+        with self._lock:
+            tracked = self.ingredients[ingredient_name]
+            delta = weight - tracked["added"]
+            tracked["added"] = float(weight)
+
+            if tracked["category"] == 'flour':
+                self._flour_weight += delta
+            elif tracked["category"] == 'water':
+                self._water_weight += delta
+            self._liquid_weight += delta * tracked["liquid_part"]
+
+            update = {
+                "ingredient": self._ingredient_status(ingredient_name),
+                "hydration": self.hydration,
+                "water_split": self._water_status()
+            }
+            self._publish(update)
+
+        return update
+
+    def _ingredient_status(self, name):
+        """ Target, added and remaining weight of one ingredient."""
+        tracked = self.ingredients[name]
+        return {
+            "name": name,
+            "target": round(tracked["target"], 1),
+            "added": round(tracked["added"], 1),
+            "remaining": round(max(tracked["target"] - tracked["added"], 0), 1)
+        }
+
+    def _water_status(self):
+        """ How much of the main pour and the held-back water is still to add."""
+        added = self._water_weight
+        main = self.water_split["main_water"]
+        held_back = self.water_split["held_back_water"]
+
+        return {
+            "main_remaining": round(max(main - added, 0), 1),
+            "held_back_remaining": round(min(max(main + held_back - added, 0), held_back), 1)
+        }
+
+    def snapshot(self):
+        """ Full status of the session, eg. for a scale that just connected."""
+        with self._lock:
+            return {
+                "recipe": self.recipe.name,
+                "ingredients": [self._ingredient_status(name) for name in self.ingredients],
+                "hydration": self.hydration,
+                "water_split": self._water_status()
+            }
+
+    def subscribe(self):
+        """ Returns a queue that receives every update of this session.
+
+        A subscriber that falls SUBSCRIBER_QUEUE_SIZE updates behind loses the
+        oldest ones. On a closed session, the queue only holds the final None.
+        """
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            if self.closed:
+                subscriber.put(None)
+            else:
+                self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """ Stop sending updates to a subscriber queue."""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def close(self):
+        """ End the session, subscribers receive None as last update."""
+        with self._lock:
+            self.closed = True
+            self._publish(None)
+            self._subscribers.clear()
+
+    def _publish(self, update):
+        for subscriber in self._subscribers:
+            self._put_latest(subscriber, update)
+
+    @staticmethod
+    def _put_latest(subscriber, update):
+        """ Queue an update without blocking, making room by dropping the oldest one."""
+        while True:
+            try:
+                subscriber.put_nowait(update)
+                return
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
@@ -0,0 +1,95 @@
+"""
+filename: scale_feeder.py
+-------------------------
+
+Simulated bench scales for the live weighing stream in app.py.
+Every scale gets a recipe and then pours each ingredient in small,
+slightly noisy steps, posting a reading several times a second.
+
+Usage:
+    python app.py
+    python scale_feeder.py --scales 24 --rate 5
+    curl -N http://127.0.0.1:5000/scales/scale-1/stream
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+
+from models.recipe import Recipe
+
+DEFAULT_URL = "http://127.0.0.1:5000"
+DEFAULT_SCALES = 12
+DEFAULT_RATE = 5        # readings per second, per scale
+POUR_STEPS = 20         # readings to pour one ingredient
+
+
+def post(url, data):
+    """Post JSON and return the decoded JSON answer."""
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(data).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read())
+
+
+def run_scale(base_url, scale_id, recipe, rate, rng):
+    """Weigh out a full recipe on one simulated scale.
+
+    Returns:
+        int: Number of readings sent.
+    """
+    post(f"{base_url}/scales/{scale_id}", recipe.to_dict())
+    readings = 0
+
+    for ingredient in recipe.ingredients:
+        for step in range(1, POUR_STEPS + 1):
+            noise = rng.uniform(-0.5, 0.5)
+            weight = max(ingredient.weight * step / POUR_STEPS + noise, 0)
+            post(f"{base_url}/scales/{scale_id}/readings",
+                 {"ingredient": ingredient.name, "weight": round(weight, 1)})
+            readings += 1
+            time.sleep(1 / rate)
+
+    return readings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate bench scales.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--scales", type=int, default=DEFAULT_SCALES)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    recipe = Recipe.from_bakers_percentage(
+        "Scale Room Loaf", 1000, {"water": 0.70, "salt": 0.02, "levain": 0.20}
+    )
+    counts = {}
+
+    def worker(n):
+        scale_id = f"scale-{n}"
+        rng = random.Random(None if args.seed is None else args.seed + n)
+        counts[scale_id] = run_scale(args.url, scale_id, recipe, args.rate, rng)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(1, args.scales + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(counts.values())
+    print(f"{args.scales} scales sent {total} readings in {elapsed:.1f}s "
+          f"({total / elapsed:.0f} readings/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+filename: serve.py
+------------------
+
+Pre-fork server for Bread Buddy. A parent process loads all models and
+templates once, opens the socket and then forks the workers. Every worker
+starts warm, so a new container can take requests right away.
+
+Usage:
+    python serve.py --workers 4 --port 8000
+
+Live weighing sessions live inside one process, so the /scales routes are
+switched off (503) with more than one worker. Use --workers 1 in the scale room.
+"""
+
+import argparse
+import contextlib
+import os
+import signal
+
+from werkzeug.serving import make_server
+
+from app import create_app
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+STOP_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+
+@contextlib.contextmanager
+def stop_signals_blocked():
+    """Hold back SIGTERM and SIGINT, they are delivered when the block ends."""
+    signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+    try:
+        yield
+    finally:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+
+
+def spawn_worker(server):
+    """Fork one worker that serves on the shared socket. Returns its pid.
+
+    Call it with the stop signals blocked, so the parent's handler never runs
+    in the worker, and the parent knows the pid before it can handle a stop.
+    """
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+        try:
+            server.serve_forever()
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, config=None):
+    """Warm up the app in this process, then fork and watch the workers.
+
+    Args:
+        host: Address to listen on. Default 127.0.0.1.
+        port: Port to listen on. Default 8000.
+        workers: Number of worker processes. Default: one per CPU.
+        config: Extra app config, see create_app().
+    """
+    workers = workers or os.cpu_count() or 1
+    app = create_app({**(config or {}), "PRELOAD": True, "LIVE_WEIGHING": workers == 1})
+    server = make_server(host, port, app, threaded=True)
+    if workers > 1:
+        print(f"Live weighing is off with {workers} workers, use --workers 1 for the scale room.")
+    children = set()
+    running = True
+
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                # Already reaped by os.wait(), but not discarded yet.
+                pass
+
+    with stop_signals_blocked():
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        children.update(spawn_worker(server) for _ in range(workers))
+    print(f"Serving on http://{host}:{server.port} with {workers} warm worker(s)")
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        # A worker crashed: replace it with a fresh fork of the warm parent.
+        with stop_signals_blocked():
+            if running:
+                children.add(spawn_worker(server))
+
+    server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Bread Buddy with pre-forked warm workers.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--templates", default=None,
+                        help="Folder with precompiled templates, see `flask compile-templates`.")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, {"PRECOMPILED_TEMPLATES": args.templates})
+
+
+if __name__ == "__main__":
+    main()
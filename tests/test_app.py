@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from jinja2 import ModuleLoader
+
+import models
+from app import create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_MODULES = [f"models{module}" for module in models._LAZY_CLASSES.values()]
+FORM = {"flour_weight": "1000", "water_ratio": "70", "salt_ratio": "2", "levain_ratio": "20"}
+
+# Runs in a fresh process: which model modules are loaded after the given code.
+LOADED_MODELS = """
+import json, sys
+import app
+{code}
+print(json.dumps([name for name in sys.modules if name.startswith("models.")]))
+"""
+
+
+def loaded_models(code=""):
+    run = subprocess.run([sys.executable, "-c", LOADED_MODELS.format(code=code)],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(json.loads(run.stdout))
+
+
+@pytest.fixture
+def compiled(tmp_path):
+    result = create_app().test_cli_runner().invoke(args=["compile-templates", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    return tmp_path
+
+
+def test_import_is_lazy():
+    assert loaded_models("app.create_app()").isdisjoint(MODEL_MODULES)
+
+
+def test_preload_loads_models():
+    assert loaded_models("app.create_app({'PRELOAD': True})").issuperset(MODEL_MODULES)
+
+
+def test_precompiled_templates(compiled):
+    app = create_app({"PRECOMPILED_TEMPLATES": str(compiled)})
+    client = app.test_client()
+    assert client.get("/").status_code == 200
+    assert "Your Recipe:" in client.post("/results", data=FORM).get_data(as_text=True)
+
+    # Both came from the compiled modules, not from the template folder.
+    for name in ("index.html", "_results.html"):
+        module = app.jinja_env.get_template(name).root_render_func.__module__
+        assert module.endswith(f".{ModuleLoader.get_template_key(name)}")
+
+
+def test_uncompiled_template_loads_from_source(compiled):
+    (compiled / ModuleLoader.get_module_filename("_results.html")).unlink()
+    client = create_app({"PRECOMPILED_TEMPLATES": str(compiled)}).test_client()
+    assert "Your Recipe:" in client.post("/results", data=FORM).get_data(as_text=True)
+
+
+def test_missing_compiled_folder(tmp_path, caplog):
+    client = create_app({"PRECOMPILED_TEMPLATES": str(tmp_path / "missing")}).test_client()
+    assert "No precompiled templates" in caplog.text
+    assert client.get("/").status_code == 200
@@ -0,0 +1,121 @@
+import gzip
+
+import pytest
+
+from app import create_app
+from assets import AssetPipeline, minify_css
+
+FONT = b"wOF2" + bytes(range(256)) * 4
+CSS = """
+/* Fonts */
+@font-face {
+    font-family: "Test";
+    src: url("fonts/test.woff2") format("woff2");
+}
+
+body  {
+    color : black;
+    background: url(https://example.com/bg.png);
+}
+"""
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    (tmp_path / "fonts").mkdir()
+    (tmp_path / "fonts" / "test.woff2").write_bytes(FONT)
+    (tmp_path / "style.css").write_text(CSS)
+    return tmp_path
+
+
+def test_minify_css():
+    assert minify_css("/* comment */\na  {\n  color : red ;\n}\n") == "a{color:red}"
+
+
+def test_fingerprints_follow_content(static_folder):
+    assets = AssetPipeline(str(static_folder))
+    name = assets.fingerprinted("style.css")
+    assert name.startswith("style.") and name.endswith(".css")
+    assert assets.get(name).name == "style.css"
+    assert assets.fingerprinted("missing.css") is None
+
+    (static_folder / "style.css").write_text(CSS + "p { color: red; }")
+    changed = AssetPipeline(str(static_folder))
+    assert changed.fingerprinted("style.css") != name
+    # The old name is outdated, not served anymore.
+    assert changed.get(name) is None
+
+
+def test_css_points_to_fingerprinted_fonts(static_folder):
+    assets = AssetPipeline(str(static_folder))
+    css = assets.assets["style.css"].body.decode()
+    font = assets.fingerprinted("fonts/test.woff2")
+
+    assert f'url("{font}")' in css
+    assert "url(https://example.com/bg.png)" in css
+    assert "/*" not in css
+
+
+def test_only_text_is_compressed(static_folder):
+    assets = AssetPipeline(str(static_folder))
+    style = assets.assets["style.css"]
+    assert gzip.decompress(style.encoded["gzip"]) == style.body
+    assert all(len(data) < len(style.body) for data in style.encoded.values())
+    assert assets.assets["fonts/test.woff2"].encoded == {}
+
+
+def test_asset_route(client):
+    page = client.get("/").get_data(as_text=True)
+    url = page.split('<link rel="stylesheet" href="', 1)[1].split('"', 1)[0]
+    assert url.startswith("/assets/style.")
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 365 * 24 * 60 * 60
+    assert gzip.decompress(response.get_data()).startswith(b"*{")
+
+    identity = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+    assert identity.headers["ETag"] != response.headers["ETag"]
+
+    cached = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_unknown_asset(client):
+    assert client.get("/assets/style.0000000000.css").status_code == 404
+
+
+def test_page_etag_and_gzip(client):
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"Bread Buddy" in gzip.decompress(response.get_data())
+
+    cached = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_results_fragment(client):
+    form = {"flour_weight": "1000", "water_ratio": "70", "salt_ratio": "2", "levain_ratio": "20"}
+    fragment = client.post("/results", data=form).get_data(as_text=True)
+    assert "Your Recipe:" in fragment
+    assert "<html" not in fragment
+
+    error = client.post("/results", data={**form, "flour_weight": "lots"}).get_data(as_text=True)
+    assert "Error:" in error
+
+
+def test_font_links_need_their_files(static_folder):
+    app = create_app()
+    (static_folder / "fonts" / "newsreader.css").write_text(
+        '@font-face { src: url("newsreader-italic.woff2"); }'
+    )
+    (static_folder / "fonts" / "newsreader-italic.woff2").write_bytes(FONT)
+    app.extensions["assets"] = AssetPipeline(str(static_folder))
+
+    page = app.test_client().get("/").get_data(as_text=True)
+    assert "/assets/fonts/newsreader." in page
+    assert 'rel="preload"' not in page
+    assert "None" not in page
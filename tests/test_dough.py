@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+
+from models.dough import Dough
+from models.recipe import Recipe
+
+START = datetime(2026, 10, 19, 20, 0)
+
+
+@pytest.fixture
+def dough():
+    return Dough(Recipe.from_bakers_percentage("Test Loaf", 1000, {"water": 0.70}))
+
+
+def test_simulation_is_reproducible(dough):
+    deadline = datetime(2026, 10, 20, 0, 0)
+    one = dough.simulate_fermentation(deadline, start=START, samples=60_000, seed=3, workers=1)
+    many = dough.simulate_fermentation(deadline, start=START, samples=60_000, seed=3, workers=2)
+    assert one == many
+    assert 0 < one["miss_probability"] < 1
+
+
+def test_simulation_ends_past_midnight(dough):
+    result = dough.simulate_fermentation(datetime(2026, 10, 20, 6, 0), start=START, samples=1000)
+    ends = [completion["end"] for completion in result["completion"].values()]
+    assert ends == sorted(ends)
+    assert ends[-1].date() == datetime(2026, 10, 20).date()
+    assert result["deadline"] == datetime(2026, 10, 20, 6, 0)
+
+
+@pytest.mark.parametrize("percentiles", [(-1, 50), (50, 101)])
+def test_simulation_rejects_bad_percentiles(dough, percentiles):
+    with pytest.raises(ValueError):
+        dough.simulate_fermentation(START, start=START, samples=10, percentiles=percentiles)
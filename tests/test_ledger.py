@@ -0,0 +1,124 @@
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import pytest
+
+from models.ledger import FeedingLedger, fcntl
+from models.levain import Levain
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return FeedingLedger(tmp_path / "ledger")
+
+
+@pytest.fixture
+def levain():
+    return Levain("Levy", feeding_ratio=(1, 1, 0.2))
+
+
+def record(ledger, levain, when, **measurements):
+    ledger.record(levain, levain.calculate_feeding(220), when, **measurements)
+
+
+def test_record_and_read_back(ledger, levain):
+    record(ledger, levain, datetime(2026, 8, 1, 8), levain_temp=24, rise=2.5, peak_hours=5.5)
+
+    [feeding] = FeedingLedger(ledger.path).feedings()
+    assert feeding["timestamp"] == datetime(2026, 8, 1, 8)
+    assert feeding["levain"] == "Levy"
+    assert feeding["count"] == 1
+    assert (feeding["flour_ratio"], feeding["water_ratio"], feeding["starter_ratio"]) == (1, 1, 0.2)
+    assert feeding["flour_weight"] == 100.0
+    assert feeding["levain_temp"] == 24
+    assert feeding["ambient_temp"] is None
+    assert feeding["peak_hours"] == 5.5
+
+
+def test_range_and_levain_filters(ledger, levain):
+    other = Levain("Rye", feeding_ratio=(1, 1, 0.5))
+    record(ledger, levain, datetime(2026, 7, 31, 20))
+    record(ledger, levain, datetime(2026, 8, 1, 8))
+    record(ledger, other, datetime(2026, 8, 1, 9))
+    record(ledger, levain, datetime(2026, 9, 1, 8))
+
+    assert len(ledger.feedings(datetime(2026, 8, 1), datetime(2026, 9, 1))) == 2
+    assert len(ledger.feedings(levain="Levy")) == 3
+    assert ledger.feedings(levain="Spelt") == []
+
+
+def test_aggregate_per_month_and_ratio(ledger, levain):
+    other = Levain("Rye", feeding_ratio=(1, 1, 0.5))
+    record(ledger, levain, datetime(2026, 8, 1, 8), peak_hours=4)
+    record(ledger, levain, datetime(2026, 8, 2, 8), peak_hours=6)
+    record(ledger, other, datetime(2026, 8, 2, 9), peak_hours=3)
+    record(ledger, levain, datetime(2026, 9, 1, 8), peak_hours=7)
+
+    assert ledger.aggregate("peak_hours") == {
+        ("2026-08", (1.0, 1.0, 0.2)): 5.0,
+        ("2026-08", (1.0, 1.0, 0.5)): 3.0,
+        ("2026-09", (1.0, 1.0, 0.2)): 7.0,
+    }
+    with pytest.raises(ValueError):
+        ledger.aggregate("flavour")
+
+
+def test_compaction_keeps_aggregates(ledger, levain):
+    record(ledger, levain, datetime(2026, 8, 1, 8), peak_hours=4, rise=2.0)
+    record(ledger, levain, datetime(2026, 8, 1, 20), rise=3.0)
+    record(ledger, levain, datetime(2026, 8, 2, 8), peak_hours=8)
+    record(ledger, levain, datetime(2026, 9, 1, 8), peak_hours=5)
+    before = {column: ledger.aggregate(column) for column in ("peak_hours", "rise", "levain_temp")}
+
+    assert ledger.compact(datetime(2026, 9, 1)) == 1
+    assert {column: ledger.aggregate(column) for column in before} == before
+    assert before["peak_hours"][("2026-08", (1.0, 1.0, 0.2))] == 6.0
+
+    day = ledger.feedings(datetime(2026, 8, 1), datetime(2026, 8, 2))
+    assert [(f["count"], f["peak_hours"], f["rise"]) for f in day] == [(2, 4.0, 2.5)]
+    # The current month isn't touched, compacting again changes nothing.
+    assert len(ledger.feedings(datetime(2026, 9, 1))) == 1
+    assert ledger.compact(datetime(2026, 9, 1)) == 0
+
+
+def test_partly_written_row_is_ignored_and_repaired(ledger, levain):
+    record(ledger, levain, datetime(2026, 8, 1, 8), peak_hours=4)
+    # A crash after writing only the timestamp of the next row.
+    with open(os.path.join(ledger.path, "2026-08", "timestamp.bin"), "ab") as f:
+        f.write(b"\0" * 8)
+
+    assert len(ledger.feedings()) == 1
+    record(ledger, levain, datetime(2026, 8, 2, 8), peak_hours=6)
+    assert [f["peak_hours"] for f in ledger.feedings()] == [4.0, 6.0]
+
+
+@pytest.mark.parametrize("swapped", [False, True])
+def test_crashed_compaction_is_recovered(ledger, levain, swapped):
+    record(ledger, levain, datetime(2026, 8, 1, 8), peak_hours=4)
+    record(ledger, levain, datetime(2026, 8, 1, 20), peak_hours=8)
+    month_dir = os.path.join(ledger.path, "2026-08")
+    # A crash between the two renames of the swap, or right after them.
+    os.rename(month_dir, f"{month_dir}.old.tmp")
+    os.makedirs(f"{month_dir}.tmp")
+    if swapped:
+        os.rename(f"{month_dir}.tmp", month_dir)
+        shutil.copytree(f"{month_dir}.old.tmp", month_dir, dirs_exist_ok=True)
+
+    reopened = FeedingLedger(ledger.path)
+    assert [f["peak_hours"] for f in reopened.feedings()] == [4.0, 8.0]
+    assert sorted(os.listdir(ledger.path)) == [".lock", "2026-08", "levains.json"]
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_readers_wait_for_writers(ledger, levain):
+    record(ledger, levain, datetime(2026, 8, 1, 8), peak_hours=4)
+    feedings = []
+    with ledger._locked():
+        reader = threading.Thread(target=lambda: feedings.extend(ledger.feedings()))
+        reader.start()
+        reader.join(0.2)
+        assert reader.is_alive()
+    reader.join()
+    assert len(feedings) == 1
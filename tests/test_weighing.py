@@ -0,0 +1,112 @@
+import math
+
+import pytest
+
+from app import create_app
+from models.recipe import Recipe
+from models.weighing import SUBSCRIBER_QUEUE_SIZE, WeighingSession
+
+
+@pytest.fixture
+def recipe():
+    return Recipe.from_bakers_percentage("Test Loaf", 1000, {"water": 0.70, "salt": 0.02, "levain": 0.20})
+
+
+def test_divide_water(recipe):
+    assert recipe.divide_water() == {"water_weight": 700.0, "main_water": 630.0, "held_back_water": 70.0}
+    with pytest.raises(ValueError):
+        recipe.divide_water(1)
+
+
+def test_readings_update_targets_and_hydration(recipe):
+    session = WeighingSession(recipe)
+    session.add_reading("flour", 1000)
+    update = session.add_reading("water", 650)
+
+    assert update["ingredient"] == {"name": "water", "target": 700.0, "added": 650.0, "remaining": 50.0}
+    assert update["hydration"] == 65.0
+    assert update["water_split"] == {"main_remaining": 0, "held_back_remaining": 50.0}
+
+    # Readings replace the previous weight of that ingredient, they don't add up.
+    update = session.add_reading("water", 600)
+    assert update["hydration"] == 60.0
+    assert update["water_split"]["main_remaining"] == 30.0
+
+
+def test_hydration_matches_recipe(recipe):
+    session = WeighingSession(recipe)
+    for ingredient in recipe.ingredients:
+        session.add_reading(ingredient.name, ingredient.weight)
+    assert session.hydration == recipe.hydration_percentage
+
+
+@pytest.mark.parametrize("weight", [-1, math.nan, math.inf])
+def test_bad_readings_are_rejected(recipe, weight):
+    session = WeighingSession(recipe)
+    with pytest.raises(ValueError):
+        session.add_reading("water", weight)
+    assert session.snapshot()["water_split"] == {"main_remaining": 630.0, "held_back_remaining": 70.0}
+
+
+def test_unknown_ingredient(recipe):
+    with pytest.raises(ValueError):
+        WeighingSession(recipe).add_reading("sugar", 10)
+
+
+def test_subscribers_get_updates_until_closed(recipe):
+    session = WeighingSession(recipe)
+    subscriber = session.subscribe()
+    session.add_reading("water", 100)
+    session.close()
+
+    assert subscriber.get_nowait()["ingredient"]["added"] == 100.0
+    assert subscriber.get_nowait() is None
+    # Late subscribers to a closed session don't wait forever.
+    assert session.subscribe().get_nowait() is None
+
+
+def test_stalled_subscriber_keeps_the_latest_updates(recipe):
+    session = WeighingSession(recipe)
+    subscriber = session.subscribe()
+    for weight in range(1, 101):
+        session.add_reading("water", weight)
+    session.close()
+
+    updates = []
+    while not subscriber.empty():
+        updates.append(subscriber.get_nowait())
+    assert len(updates) == SUBSCRIBER_QUEUE_SIZE
+    assert updates[-2]["ingredient"]["added"] == 100.0
+    assert updates[-1] is None
+
+
+def test_scale_routes(client, recipe):
+    assert client.post("/scales/bench-1/readings", json={"ingredient": "water", "weight": 1}).status_code == 404
+
+    response = client.post("/scales/bench-1", json=recipe.to_dict())
+    assert response.status_code == 201
+
+    response = client.post("/scales/bench-1/readings", json={"ingredient": "water", "weight": 350})
+    assert response.status_code == 200
+    assert response.json["ingredient"]["remaining"] == 350.0
+
+    response = client.post("/scales/bench-1/readings", json={"ingredient": "water", "weight": "nan"})
+    assert response.status_code == 400
+
+
+def test_stream_ends_when_scale_gets_a_new_recipe(client, recipe):
+    client.post("/scales/bench-1", json=recipe.to_dict())
+    stream = client.get("/scales/bench-1/stream", buffered=False)
+    client.post("/scales/bench-1/readings", json={"ingredient": "flour", "weight": 500})
+    client.post("/scales/bench-1", json=recipe.to_dict())
+
+    body = b"".join(stream.response).decode()
+    stream.close()
+    assert body.startswith("event: snapshot")
+    assert '"added": 500.0' in body
+
+
+def test_scale_routes_are_off_without_live_weighing(recipe):
+    client = create_app({"LIVE_WEIGHING": False}).test_client()
+    assert client.post("/scales/bench-1", json=recipe.to_dict()).status_code == 503
+    assert client.get("/").status_code == 200